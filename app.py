@@ -1,164 +1,68 @@
 import streamlit as st
+import asyncio
+import queue
 import time
-import traceback
+from concurrent.futures import ThreadPoolExecutor
 
-# Selenium imports
-import chromedriver_autoinstaller
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import *
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from resolver_core import resolve_link_flow, resolve_many
 
 
 # ---------------------------------------------------
 # Logging utility
 # ---------------------------------------------------
-def log(msg):
-    st.session_state["log"].append(msg)
-    st.write(msg)
+LOG_REFRESH = 0.5  # seconds between log redraws while a resolve runs
 
 
-# ---------------------------------------------------
-# Start Chrome for Streamlit Cloud
-# ---------------------------------------------------
-def start_driver():
-    chromedriver_autoinstaller.install()  # auto install the correct chromedriver
-
-    chrome_options = Options()
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-
-    driver = webdriver.Chrome(options=chrome_options)
-    driver.set_page_load_timeout(30)
-    return driver
-
-
-# ---------------------------------------------------
-# Helpers
-# ---------------------------------------------------
-def wait_for_countdown(driver):
-    """wait until timer ce-time or timer id reaches 0"""
-    ids = ["ce-time", "timer"]
-    start = time.time()
-    while time.time() - start < 40:
-        found = False
-        for cid in ids:
-            try:
-                el = driver.find_element(By.ID, cid)
-                txt = el.text.strip()
-                if txt.isdigit():
-                    log(f"⏳ Countdown: {txt}")
-                    if int(txt) <= 0:
-                        log("⏳ Countdown reached 0.")
-                        return
-                found = True
-            except:
-                pass
-        if not found:
-            return
-        time.sleep(1)
-
-
-def click_buttons(driver):
-    """Try verify & continue buttons"""
-    selectors = [
-        (By.ID, "btn6"),  # Verify
-        (By.ID, "btn7"),  # Continue
-    ]
-    texts = ["Verify", "Continue"]
-
-    for by, val in selectors:
-        try:
-            btn = driver.find_element(by, val)
-            btn.click()
-            log(f"🔘 Clicked button: {val}")
-            time.sleep(1.2)
-            return True
-        except:
-            pass
-
-    for txt in texts:
-        try:
-            btn = driver.find_element(By.XPATH, f"//*[text()='{txt}']")
-            btn.click()
-            log(f"🔘 Clicked button: {txt}")
-            time.sleep(1.2)
-            return True
-        except:
-            pass
-
-    return False
-
-
-def find_final_link(driver):
-    """Extract 'Get Link' button href"""
-    try:
-        el = driver.find_element(By.ID, "get-link")
-        href = el.get_attribute("href")
-        return href
-    except:
-        pass
-
-    anchors = driver.find_elements(By.TAG_NAME, "a")
-    for a in anchors:
-        href = a.get_attribute("href") or ""
-        if "telegram" in href or "http" in href:
-            if "get" in a.text.lower():
-                return href
-    return None
+def render_log():
+    log_box.markdown("\n\n".join(st.session_state["log"]))
 
 
 # ---------------------------------------------------
-# Core automation flow
+# Background worker
 # ---------------------------------------------------
-def resolve(start_url):
-    driver = start_driver()
-    current = start_url
+def get_executor():
+    """this session's worker thread, kept alive across its reruns"""
+    if "executor" not in st.session_state:
+        st.session_state["executor"] = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="resolver"
+        )
+    return st.session_state["executor"]
 
-    try:
-        for step in range(12):
-            log(f"\n### Step {step+1}: Opening {current}")
 
-            try:
-                driver.get(current)
-            except:
-                log("⚠️ Navigation error, continuing...")
+def resolve_single(urls, log_callback):
+    return [resolve_link_flow(urls[0], log_callback)]
 
-            time.sleep(2)
 
-            wait_for_countdown(driver)
+def resolve_batch(urls, log_callback):
+    return asyncio.run(resolve_many(urls, log_callback))
 
-            clicked = click_buttons(driver)
 
-            time.sleep(1.5)
+def start_job(urls):
+    """submit a resolve for urls; the job lives in session state across reruns"""
+    fn = resolve_single if len(urls) == 1 else resolve_batch
+    log_queue = queue.Queue()
+    future = get_executor().submit(fn, urls, log_queue.put)
+    return {"urls": urls, "future": future, "log_queue": log_queue}
 
-            # detect redirect
-            new_url = driver.current_url
-            if new_url != current:
-                log(f"➡️ Redirected to: {new_url}")
-                current = new_url
 
-            # find final link
-            final = find_final_link(driver)
-            if final:
-                log("🎉 FINAL LINK FOUND:")
-                log(final)
-                return final
+def wait_for_job(job):
+    """follow a job until it finishes and return its outputs
 
-        return None
-
-    except Exception as e:
-        log(f"❌ Error: {e}")
-        log(traceback.format_exc())
-        return None
-
-    finally:
-        driver.quit()
+    Workers only push log lines onto the job's queue; this script thread is
+    the only one that touches st.*, draining the queue every LOG_REFRESH
+    seconds. A rerun interrupts this loop but not the job, and the next run
+    picks it up again from session state.
+    """
+    future, log_queue = job["future"], job["log_queue"]
+    while True:
+        # check before draining so lines logged just before exit still show
+        finished = future.done()
+        while not log_queue.empty():
+            st.session_state["log"].append(log_queue.get_nowait())
+        render_log()
+        if finished:
+            return future.result()
+        time.sleep(LOG_REFRESH)
 
 
 # ---------------------------------------------------
@@ -169,25 +73,54 @@ st.title("🔗 Auto Link Resolver (Selenium + Streamlit)")
 
 if "log" not in st.session_state:
     st.session_state["log"] = []
+    st.session_state["job"] = None
 
-url = st.text_input("Enter AroLinks URL:", placeholder="https://arolinks.com/XXXXX")
+text = st.text_area(
+    "Enter AroLinks URL(s), one per line:", placeholder="https://arolinks.com/XXXXX"
+)
+urls = [line.strip() for line in text.splitlines() if line.strip()]
 
-if st.button("Start"):
-    st.session_state["log"] = []
+start = st.button("Start")
+result_box = st.container()
 
-    if not url.strip():
-        st.error("Enter a valid URL.")
+st.write("### 📜 Logs:")
+log_box = st.empty()
+
+job = st.session_state["job"]
+if start:
+    if job is not None and not job["future"].done():
+        result_box.warning("Still resolving the previous link(s), please wait.")
+    elif not urls:
+        st.session_state["job"] = None
+        result_box.error("Enter a valid URL.")
     else:
-        st.write("⚙️ Running automation... please wait 10–20 seconds ⏳")
-        output = resolve(url)
-
-        if output:
-            st.success("Final Link:")
-            st.code(output)
+        st.session_state["log"] = []
+        st.session_state["job"] = start_job(urls)
+
+job = st.session_state["job"]
+if job is not None:
+    with result_box:
+        job_urls = job["urls"]
+        if not job["future"].done():
+            if len(job_urls) == 1:
+                st.write("⚙️ Running automation... please wait 10–20 seconds ⏳")
+            else:
+                st.write(f"⚙️ Resolving {len(job_urls)} links in parallel... ⏳")
+
+        outputs = wait_for_job(job)
+
+        if len(job_urls) == 1:
+            if outputs[0]:
+                st.success("Final Link:")
+                st.code(outputs[0])
+            else:
+                st.error("Could not fetch final link.")
         else:
-            st.error("Could not fetch final link.")
-
-st.write("### 📜 Logs:")
-for line in st.session_state["log"]:
-    st.write(line)
-
+            for url, output in zip(job_urls, outputs):
+                if output:
+                    st.success(f"Final Link for {url}:")
+                    st.code(output)
+                else:
+                    st.error(f"Could not fetch final link for {url}.")
+
+render_log()
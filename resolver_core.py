@@ -0,0 +1,680 @@
+"""Selenium backend for the link resolver, shared by every frontend.
+
+Frontends pass a `log_callback(msg)` and never touch the driver directly.
+"""
+import asyncio
+import atexit
+import functools
+import itertools
+import os
+import queue
+import random
+import re
+import shutil
+import threading
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Selenium imports
+import chromedriver_autoinstaller
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import (
+    JavascriptException,
+    TimeoutException,
+    WebDriverException,
+)
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+# ---------------------------------------------------
+# Start Chrome
+# ---------------------------------------------------
+POOL_SIZE = 2
+MAX_STEPS = 12
+
+# Nothing the resolver looks at needs these; stylesheets are kept because
+# the visible-button check depends on them.
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.woff", "*.woff2", "*.ttf",
+    "*googletagmanager*", "*doubleclick*", "*google-analytics*",
+]
+
+# Persistent Chrome profiles keep the HTTP cache and TLS session tickets for
+# the shortener hosts across steps and resolves. Chrome locks a profile, so
+# every live driver gets its own numbered slot, under a directory private to
+# this process; other app or CLI processes use their own.
+PROFILE_ROOT = Path.home() / ".cache" / "link-resolver-chrome"
+_PROCESS_PROFILES = PROFILE_ROOT / f"pid-{os.getpid()}"
+DISK_CACHE_SIZE = 100 * 1024 * 1024
+
+_profile_lock = threading.Lock()
+_free_profiles = []
+_next_profile = itertools.count()
+
+
+def _acquire_profile():
+    with _profile_lock:
+        return _free_profiles.pop() if _free_profiles else next(_next_profile)
+
+
+def _release_profile(slot):
+    with _profile_lock:
+        _free_profiles.append(slot)
+
+
+def _profile_dir(slot):
+    return _PROCESS_PROFILES / f"profile-{slot}"
+
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _sweep_stale_profiles():
+    """remove profile dirs left behind by processes that died without atexit"""
+    for path in PROFILE_ROOT.glob("pid-*"):
+        try:
+            pid = int(path.name[len("pid-"):])
+        except ValueError:
+            continue
+        if pid != os.getpid() and not _pid_alive(pid):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+_sweep_stale_profiles()
+
+
+@functools.lru_cache()
+def chromedriver_path():
+    """$CHROMEDRIVER_PATH if set, else auto install the correct chromedriver
+
+    Resolved once per process so later drivers skip the version check.
+    """
+    return os.environ.get("CHROMEDRIVER_PATH") or chromedriver_autoinstaller.install()
+
+
+# Chrome switches shared by every driver; the per-driver profile dir and
+# headless mode are added by make_options()
+_BASE_OPTIONS_ARGS = (
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-blink-features=AutomationControlled",
+    "--blink-settings=imagesEnabled=false",
+    f"--disk-cache-size={DISK_CACHE_SIZE}",
+)
+_BASE_PREFS = {"profile.managed_default_content_settings.images": 2}
+
+
+def make_options(headless=True, profile_dir=None):
+    """fresh ChromeOptions built from the shared switches"""
+    chrome_options = Options()
+    # return from driver.get() once the DOM is parsed, not after every ad loads
+    chrome_options.page_load_strategy = "eager"
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    for arg in _BASE_OPTIONS_ARGS:
+        chrome_options.add_argument(arg)
+    if profile_dir is not None:
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+    chrome_options.add_experimental_option("prefs", dict(_BASE_PREFS))
+    return chrome_options
+
+
+def start_driver(headless=True):
+    service = Service(chromedriver_path())
+    profile = _acquire_profile()
+    chrome_options = make_options(headless, _profile_dir(profile))
+
+    try:
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+    except WebDriverException:
+        _release_profile(profile)
+        raise
+    driver.profile_slot = profile
+    driver.visited_urls = set()
+
+    try:
+        driver.set_page_load_timeout(10)
+        _configure_tab(driver)
+    except WebDriverException:
+        _quit_quietly(driver)
+        raise
+    return driver
+
+
+def _configure_tab(driver):
+    # CDP settings apply to the current tab only
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+
+
+# ---------------------------------------------------
+# Driver pool
+# ---------------------------------------------------
+# idle Chrome sessions, kept apart by headless mode
+_driver_pools = {
+    True: queue.Queue(maxsize=POOL_SIZE),
+    False: queue.Queue(maxsize=POOL_SIZE),
+}
+
+
+def _quit_quietly(driver):
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
+    _release_profile(driver.profile_slot)
+
+
+def drain_driver_pools():
+    """quit every idle driver left in the pools and drop this process's profiles"""
+    for pool in _driver_pools.values():
+        while True:
+            try:
+                driver = pool.get_nowait()
+            except queue.Empty:
+                break
+            _quit_quietly(driver)
+    shutil.rmtree(_PROCESS_PROFILES, ignore_errors=True)
+
+
+atexit.register(drain_driver_pools)
+
+
+def _is_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
+
+
+# site storage cleared between resolves; the HTTP cache is left alone, since
+# keeping it is the point of the persistent profile
+_SITE_STORAGE_TYPES = ",".join([
+    "file_systems", "indexeddb", "local_storage", "websql",
+    "service_workers", "cache_storage",
+])
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        return None
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _reset_driver(driver):
+    """drop everything one resolve left in the browser except the HTTP cache
+
+    The profile is on disk and the pool is shared by every frontend session,
+    so cookies, storage for the origins this resolve visited, and the tab
+    itself (which holds sessionStorage) are all cleared.
+    """
+    history = driver.execute_cdp_cmd("Page.getNavigationHistory", {})
+    urls = driver.visited_urls | {e["url"] for e in history.get("entries", [])}
+    for origin in {_origin(url) for url in urls} - {None}:
+        driver.execute_cdp_cmd(
+            "Storage.clearDataForOrigin",
+            {"origin": origin, "storageTypes": _SITE_STORAGE_TYPES},
+        )
+    driver.visited_urls.clear()
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+
+    old_tab = driver.current_window_handle
+    driver.switch_to.new_window("tab")
+    new_tab = driver.current_window_handle
+    driver.switch_to.window(old_tab)
+    driver.close()
+    driver.switch_to.window(new_tab)
+    _configure_tab(driver)
+
+
+def release_driver(pool, driver):
+    """reset a driver and park it in the pool, or quit it if that fails"""
+    try:
+        _reset_driver(driver)
+        pool.put_nowait(driver)
+    except (WebDriverException, queue.Full):
+        _quit_quietly(driver)
+
+
+def warm_driver_pool(count, headless=True):
+    """start drivers until the pool holds `count` idle ones (capped at POOL_SIZE)"""
+    pool = _driver_pools[headless]
+    for _ in range(min(count, POOL_SIZE) - pool.qsize()):
+        # best effort: a driver that fails here is retried, and logged, when
+        # a resolve borrows one
+        try:
+            driver = start_driver(headless)
+        except WebDriverException:
+            return
+        try:
+            pool.put_nowait(driver)
+        except queue.Full:
+            _quit_quietly(driver)
+            return
+
+
+@contextmanager
+def borrow_driver(headless=True):
+    """reuse an idle pooled driver, or start a new one if none is left"""
+    pool = _driver_pools[headless]
+    driver = None
+    while driver is None:
+        try:
+            driver = pool.get_nowait()
+        except queue.Empty:
+            driver = start_driver(headless)
+            break
+        if not _is_alive(driver):
+            _quit_quietly(driver)
+            driver = None
+
+    try:
+        yield driver
+    finally:
+        release_driver(pool, driver)
+
+
+# ---------------------------------------------------
+# Helpers
+# ---------------------------------------------------
+# Resolves true once the document has been parsed, false after a couple of
+# seconds so WebDriverWait can re-issue it. A document flagged stale by
+# navigate() never resolves true; it is torn down under the script instead.
+_READY_JS = """
+const done = arguments[arguments.length - 1];
+if (!window.__resolverStale && document.readyState !== 'loading') return done(true);
+const cap = setTimeout(() => done(false), 2000);
+if (!window.__resolverStale) {
+    document.addEventListener('DOMContentLoaded', () => {
+        clearTimeout(cap);
+        done(true);
+    }, {once: true});
+}
+"""
+
+# infinite animations (spinners, pulsing buttons) never finish, so skip them
+_SETTLE_JS = """
+if (!document.getAnimations) return true;
+return document.getAnimations().every(a =>
+    a.playState !== 'running'
+    || (a.effect && a.effect.getComputedTiming().iterations === Infinity)
+);
+"""
+
+# Resolves true once a countdown timer reads 0 or none is left, false after
+# a few seconds so WebDriverWait can re-issue it until its own timeout.
+_COUNTDOWN_JS = """
+const done = arguments[arguments.length - 1];
+const SELECTOR = '#ce-time, #timer';
+// the whole text must be a time: "5", "5s", "-1" or "mm:ss" like "00:15"
+const TIME = /^\\s*(?:(\\d+):)?(-?\\d+)\\s*s?\\s*$/i;
+const seconds = (txt) => {
+    const m = TIME.exec(txt);
+    return m ? parseInt(m[1] || '0', 10) * 60 + parseInt(m[2], 10) : null;
+};
+const finished = () => {
+    const timers = document.querySelectorAll(SELECTOR);
+    if (!timers.length) return true;
+    for (const el of timers) {
+        const left = seconds(el.textContent);
+        if (left !== null && left <= 0) return true;
+    }
+    return false;
+};
+if (finished()) return done(true);
+
+let observer, poll, expire;
+const finish = (result) => {
+    observer.disconnect();
+    clearInterval(poll);
+    clearTimeout(expire);
+    done(result);
+};
+const check = () => { if (finished()) finish(true); };
+observer = new MutationObserver(check);
+observer.observe(document.documentElement, {subtree: true, childList: true, characterData: true});
+poll = setInterval(check, 100);
+expire = setTimeout(() => finish(false), 5000);
+"""
+
+_CLICK_BUTTONS_JS = """
+// a btn6 that was already clicked is usually hidden; move on to btn7
+for (const id of ['btn6', 'btn7']) {
+    const el = document.getElementById(id);
+    if (el && el.getClientRects().length > 0) { el.click(); return id; }
+}
+// one pass over the candidates, Verify still wins over Continue
+const RX = /^(verify|continue)$/i;
+const hits = {};
+for (const el of document.querySelectorAll('button, a')) {
+    const m = RX.exec(el.textContent.trim());
+    if (!m || el.getClientRects().length === 0) continue;
+    const key = m[1].toLowerCase();
+    if (!hits[key]) hits[key] = el;
+    if (hits.verify) break;
+}
+for (const txt of ['Verify', 'Continue']) {
+    const el = hits[txt.toLowerCase()];
+    if (el) { el.click(); return txt; }
+}
+return null;
+"""
+
+# Returns {"direct": href} for a known Get Link element, otherwise
+# {"here": page URL, "anchors": [...]} with the fields of every anchor whose
+# text mentions "get", read in one round-trip. Unusable hrefs come back "".
+_FINAL_LINK_JS = """
+// placeholders like "#" or "javascript: void(0)" sit there until the timer ends
+const here = location.href.split('#')[0];
+const usable = href => /^https?:/i.test(href) && href.split('#')[0] !== here;
+for (const id of ['get-link', 'gt-link']) {
+    const el = document.getElementById(id);
+    if (el && usable(el.href)) return {direct: el.href};
+}
+for (const el of document.querySelectorAll('a.get-link, .get-link, a.btn.get-link')) {
+    if (usable(el.href)) return {direct: el.href};
+}
+const RX = /\\bget/i;
+return {here: here, anchors: [...document.getElementsByTagName('a')]
+    .filter(a => RX.test(a.innerText || a.textContent || ''))
+    .map(a => ({
+        href: usable(a.href) ? a.href : '',
+        onclick: a.getAttribute('onclick') || '',
+        visible: a.getClientRects().length > 0,
+    }))};
+"""
+
+# WebDriverWait poll cadence for waits on async scripts. Those block in the
+# browser until their event fires (or a short cap passes), so re-issuing
+# them quickly adds no chatter; waits that poll the page from here keep
+# WebDriverWait's default.
+EVENT_POLL = 0.1
+
+# Names what the page shows that this flow can act on. A running timer wins
+# over a Get Link element, which such pages render (disabled) from the start.
+# "none" means the page finished loading without any of them. Watches the DOM
+# and the load event, resolving null after a second so WebDriverWait can
+# re-issue it.
+_LANDMARK_JS = """
+const done = arguments[arguments.length - 1];
+const has = sel => document.querySelector(sel) !== null;
+const landmark = () => {
+    if (has('#ce-time, #timer')) return 'timer';
+    if (has('#get-link, #gt-link, .get-link')) return 'final';
+    if (has('#btn6, #btn7')) return 'button';
+    return document.readyState === 'complete' ? 'none' : null;
+};
+const found = landmark();
+if (found) return done(found);
+
+let observer, cap;
+const finish = (result) => {
+    observer.disconnect();
+    window.removeEventListener('load', check);
+    clearTimeout(cap);
+    done(result);
+};
+const check = () => { const f = landmark(); if (f) finish(f); };
+observer = new MutationObserver(check);
+observer.observe(document.documentElement, {
+    subtree: true, childList: true, attributes: true, attributeFilter: ['id', 'class'],
+});
+window.addEventListener('load', check);
+cap = setTimeout(() => finish(null), 1000);
+"""
+
+_ONCLICK_URL_RE = re.compile(r"https?://[^'\"\s)]+")
+
+
+def _anchor_target(anchor, here):
+    """the URL an anchor leads to, from its href or an onclick redirect
+
+    `here` is the current page without its fragment; links back to it are
+    placeholders, not targets.
+    """
+    if anchor["href"]:
+        return anchor["href"]
+    m = _ONCLICK_URL_RE.search(anchor["onclick"])
+    if m and m.group().split("#")[0] != here:
+        return m.group()
+    return None
+
+
+def navigate(driver, log, url):
+    """start loading url and return without waiting for the page
+
+    Returns True if a new document is loading, for wait_for_page_ready to
+    join. The old document is flagged first so that wait can't mistake it
+    for the new one; the flag is dropped again when no new document comes
+    (errors, fragment-only navigations, 204s and downloads).
+    """
+    try:
+        driver.execute_script("window.__resolverStale = true;")
+        result = driver.execute_cdp_cmd("Page.navigate", {"url": url})
+    except WebDriverException:
+        log("⚠️ Navigation error, continuing...")
+        return False
+
+    if result.get("errorText"):
+        log(f"⚠️ Navigation error ({result['errorText']}), continuing...")
+    elif result.get("loaderId"):
+        return True
+
+    try:
+        driver.execute_script("delete window.__resolverStale;")
+    except WebDriverException:
+        pass
+    return False
+
+
+def wait_for_page_ready(driver, log, timeout=10):
+    """wait until the document has been parsed (readyState past 'loading')"""
+    try:
+        # scripts can fail while the old document is being torn down
+        WebDriverWait(
+            driver,
+            timeout,
+            poll_frequency=EVENT_POLL,
+            ignored_exceptions=[JavascriptException],
+        ).until(lambda d: d.execute_async_script(_READY_JS))
+    except TimeoutException:
+        log("⚠️ Page still loading, continuing...")
+
+
+def wait_for_navigation(driver, log, prev_url, timeout=3):
+    """wait for a click to navigate away from prev_url, then for the new page
+
+    Waits the full timeout before giving up: Continue buttons often redirect
+    from a setTimeout or after a slow request, and re-navigating too early
+    would abort that redirect. Returns True if the URL changed.
+    """
+    try:
+        WebDriverWait(driver, timeout).until(lambda d: d.current_url != prev_url)
+    except TimeoutException:
+        return False
+    wait_for_page_ready(driver, log)
+    wait_for_settle(driver)
+    return True
+
+
+def wait_for_landmark(driver, timeout=3):
+    """wait briefly for something this flow can act on; return what it is
+
+    Returns "timer", "final", "button", or None if the page has none of them.
+    """
+    try:
+        landmark = WebDriverWait(
+            driver,
+            timeout,
+            poll_frequency=EVENT_POLL,
+            ignored_exceptions=[JavascriptException],
+        ).until(lambda d: d.execute_async_script(_LANDMARK_JS))
+    except TimeoutException:
+        return None
+    return None if landmark == "none" else landmark
+
+
+def wait_for_settle(driver, timeout=2):
+    """wait until running CSS/JS animations on the page have finished"""
+    try:
+        WebDriverWait(driver, timeout).until(lambda d: d.execute_script(_SETTLE_JS))
+    except (TimeoutException, JavascriptException):
+        pass
+
+
+def wait_for_countdown(driver, log, timeout=40):
+    """wait until timer ce-time or timer id reaches 0"""
+    if not driver.find_elements(By.CSS_SELECTOR, "#ce-time, #timer"):
+        return
+
+    log("⏳ Waiting for countdown...")
+    try:
+        # a timer that redirects on 0 unloads the page mid-script; retry there
+        WebDriverWait(
+            driver,
+            timeout,
+            poll_frequency=EVENT_POLL,
+            ignored_exceptions=[JavascriptException],
+        ).until(lambda d: d.execute_async_script(_COUNTDOWN_JS))
+        log("⏳ Countdown reached 0.")
+    except TimeoutException:
+        log("⚠️ Countdown did not finish, continuing...")
+
+
+def click_buttons(driver, log):
+    """Try verify (btn6) & continue (btn7) buttons, then visible ones by text"""
+    prev_url = driver.current_url
+    try:
+        clicked = driver.execute_script(_CLICK_BUTTONS_JS)
+    except WebDriverException:
+        return False
+
+    if not clicked:
+        return False
+
+    log(f"🔘 Clicked button: {clicked}")
+    wait_for_navigation(driver, log, prev_url)
+    return True
+
+
+def find_final_link(driver):
+    """Extract 'Get Link' button href from a single DOM snapshot"""
+    try:
+        found = driver.execute_script(_FINAL_LINK_JS)
+    except WebDriverException:
+        return None
+
+    if found.get("direct"):
+        return found["direct"]
+
+    matches = [
+        (not a["visible"], target)
+        for a in found.get("anchors", [])
+        if (target := _anchor_target(a, found.get("here", "")))
+    ]
+    # prefer what a user could actually click; sort is stable
+    matches.sort(key=lambda m: m[0])
+    return matches[0][1] if matches else None
+
+
+# ---------------------------------------------------
+# Core automation flow
+# ---------------------------------------------------
+def resolve_link_flow(
+    start_url, log_callback=print, headless=True, max_steps=MAX_STEPS
+):
+    """follow start_url through the shortener steps and return the final link"""
+    try:
+        with borrow_driver(headless) as driver:
+            return _resolve_with(driver, start_url, log_callback, max_steps)
+    except WebDriverException as e:
+        log_callback(f"❌ Could not start Chrome: {e}")
+        return None
+
+
+def _report_final(log, final):
+    log("🎉 FINAL LINK FOUND:")
+    log(final)
+    return final
+
+
+def _resolve_with(driver, start_url, log, max_steps):
+    current = start_url
+
+    try:
+        for step in range(max_steps):
+            log(f"\n### Step {step+1}: Opening {current}")
+            driver.visited_urls.add(current)
+
+            if navigate(driver, log, current):
+                wait_for_page_ready(driver, log)
+
+            # already on the final page with no timer running: skip the
+            # countdown/button round
+            if wait_for_landmark(driver) == "final":
+                final = find_final_link(driver)
+                if final:
+                    return _report_final(log, final)
+
+            wait_for_countdown(driver, log)
+
+            click_buttons(driver, log)
+
+            # detect redirect
+            new_url = driver.current_url
+            driver.visited_urls.add(new_url)
+            if new_url != current:
+                log(f"➡️ Redirected to: {new_url}")
+                current = new_url
+
+            # find final link
+            final = find_final_link(driver)
+            if final:
+                return _report_final(log, final)
+
+        return None
+
+    except Exception as e:
+        log(f"❌ Error: {e}")
+        log(traceback.format_exc())
+        return None
+
+
+async def resolve_many(
+    urls, log_callback=print, concurrency=POOL_SIZE, headless=True, jitter=0.5
+):
+    """resolve several links at once, one pooled driver per running task
+
+    log_callback is called from worker threads.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(url):
+        async with semaphore:
+            # stagger starts so N browsers don't all navigate in the same instant
+            await asyncio.sleep(random.uniform(0, jitter))
+            return await asyncio.to_thread(
+                resolve_link_flow, url, log_callback, headless
+            )
+
+    await asyncio.to_thread(warm_driver_pool, min(concurrency, len(urls)), headless)
+    return await asyncio.gather(*(run(url) for url in urls))